@@ -8,6 +8,14 @@ class YourModel(AirtableMixin, models.Model):
     name = models.CharField(max_length=200, blank=False)
     slug = models.SlugField(max_length=200, unique=True, editable=True)
 
+    # The mappings never change, so build them once rather than on every import.
+    _IMPORT_MAP = {
+        # "Name" is the column name in Airtable. "name" (lowercase) is the field name on line 8.
+        "Name": "name",
+        # "Slug" is the column name in Airtable. "slug" (lowercase) is the field name on line 9.
+        "Slug": "slug",
+    }
+
     @classmethod
     def map_import_fields(cls):
         """
@@ -18,13 +26,7 @@ class YourModel(AirtableMixin, models.Model):
 
         Return a dictionary such as: {'Airtable column name': 'model_field_name', ...}
         """
-        mappings = {
-            # "Name" is the column name in Airtable. "name" (lowercase) is the field name on line 8.
-            "Name": "name",
-            # "Slug" is the column name in Airtable. "slug" (lowercase) is the field name on line 8.
-            "Slug": "slug",
-        }
-        return mappings
+        return cls._IMPORT_MAP
 
     def get_export_fields(self):
         """
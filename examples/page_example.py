@@ -73,9 +73,7 @@ class HomePage(AirtableMixin, Page):
             "Top Rated Awesomeness": self.top_rated_page,  # Must be a checkbox column in Airtable.
             # If a cell in Airtable should always be filled, but the data might be optional at some point
             # You can use a function, method, custom property or ternary operator to set the defaults.
-            "Last Updated": self.last_published_at
-            if self.last_published_at
-            else timezone.now().isoformat(),
+            "Last Updated": (self.last_published_at or timezone.now()).isoformat(),
         }
 
     class Meta:
@@ -21,17 +21,27 @@ class TagSerializer(serializers.RelatedField):
     """
 
     def to_internal_value(self, data):
-        if type(data) == str:
-            tags = []
-            for tag in data.split(","):
-                tag, _ = Tag.objects.get_or_create(name=tag.strip())
-                tags.append(tag)
-            return tags
-        elif type(data) == list:
-            for tag in data:
-                tag, _ = Tag.objects.get_or_create(name=tag.strip())
-                tags.append(tag)
-            return tags
+        if isinstance(data, str):
+            data = data.split(",")
+        if isinstance(data, list):
+            names = list(dict.fromkeys(tag.strip() for tag in data if tag.strip()))
+            # Look up every tag in a single query and create the missing ones in bulk,
+            # rather than running a get_or_create() query per tag.
+            existing = Tag.objects.filter(name__in=names).in_bulk(field_name="name")
+            missing = [Tag(name=name) for name in names if name not in existing]
+            if missing:
+                # bulk_create() skips Tag.save(), so the slugs have to be set here.
+                for tag in missing:
+                    tag.slug = tag.slugify(tag.name)
+                Tag.objects.bulk_create(missing, ignore_conflicts=True, batch_size=1000)
+                existing.update(
+                    Tag.objects.filter(name__in=[tag.name for tag in missing]).in_bulk(field_name="name")
+                )
+            for name in names:
+                if name not in existing:
+                    # The slug clashed with another tag. Let taggit pick a unique one.
+                    existing[name], _ = Tag.objects.get_or_create(name=name)
+            return [existing[name] for name in names]
         return data
 
     def get_queryset(self):
@@ -56,12 +66,12 @@ class BankNameSerializer(serializers.RelatedField):
         from .models import BankOrganisation
 
         if data:
-            try:
-                bank = BankOrganisation.objects.get(name=data)
-            except BankOrganisation.DoesNotExist:
-                return None
-            else:
-                return bank
+            # The serializer context is shared by every record in an import, so each bank
+            # name is only looked up once per import instead of once per record.
+            bank_cache = self.context.setdefault("bank_cache", {})
+            if data not in bank_cache:
+                bank_cache[data] = BankOrganisation.objects.filter(name=data).first()
+            return bank_cache[data]
         return data
 
     def get_queryset(self):
@@ -71,16 +81,27 @@ class BankNameSerializer(serializers.RelatedField):
 class DateTimeSerializer(serializers.DateTimeField):
     # Useful for parsing an Airtable Date field into a Django DateTimeField
     def to_internal_value(self, date):
-        if type(date) == str and len(date):
-            date = parse_datetime(date).isoformat()
+        if isinstance(date, str) and date:
+            try:
+                parsed = parse_datetime(date)
+            except ValueError:
+                # Well formatted but invalid, e.g. "2020-13-45T00:00:00"
+                parsed = None
+            if parsed is None:
+                raise serializers.ValidationError("%r is not a valid date and time." % date)
+            date = parsed
         return date
 
 
 class DateSerializer(serializers.DateTimeField):
     # Useful for parsing an Airtable Date field into a Django DateField
     def to_internal_value(self, date):
-        if type(date) == str and len(date):
-            date = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+        if isinstance(date, str) and date:
+            # Slicing also accepts Airtable's full "YYYY-MM-DDTHH:MM:SS.sssZ" timestamps.
+            try:
+                date = datetime.date.fromisoformat(date[:10])
+            except ValueError:
+                raise serializers.ValidationError("%r is not a valid date." % date)
         return date
 
 
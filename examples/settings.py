@@ -4,7 +4,7 @@ COMMON_AIRTABLE_SETTINGS = {
     "AIRTABLE_TABLE_NAME": "Your Table Name",
     "AIRTABLE_UNIQUE_IDENTIFIER": {"Wagtail Page ID": "pk", },
     "AIRTABLE_SERIALIZER": "yourapp.serializers.YourPageSerializer",
-},
+}
 WAGTAIL_AIRTABLE_ENABLED = True
 WAGTAIL_AIRTABLE_DEBUG = True
 AIRTABLE_IMPORT_SETTINGS = {
@@ -26,6 +26,8 @@ AIRTABLE_IMPORT_SETTINGS = {
         "AIRTABLE_SERIALIZER": "yourapp.serializers.YourPageSerializer",  # A custom serializer for validating imported data.
     },
     # Applies to multi_page_example.py
+    # Reuse the same settings dict for every model, rather than a copy of it. Models sharing
+    # one settings object are grouped together on the Airtable import page.
     "yourapp.HomePage2": COMMON_AIRTABLE_SETTINGS,
     "yourapp.ContactPage": COMMON_AIRTABLE_SETTINGS,
     "yourapp.BlogPage": COMMON_AIRTABLE_SETTINGS,
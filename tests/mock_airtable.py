@@ -1,204 +1,137 @@
 """A mocked Airtable API wrapper."""
+from types import MappingProxyType
 from unittest import mock
 from pyairtable.formulas import match
 from requests.exceptions import HTTPError
 
-def get_mock_airtable():
-    """
-    Wrap it in a function, so it's pure
+
+def _record(record_id, **fields):
     """
+    Build a read-only Airtable record.
 
+    Records are shared by every mock, so they are wrapped in MappingProxyType to stop
+    a test from accidentally changing the data seen by the next one.
+    """
+    return MappingProxyType({"id": record_id, "fields": MappingProxyType(fields)})
+
+
+_LONG_DESCRIPTION = "<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit. Veniam laboriosam consequatur saepe. Repellat itaque dolores neque, impedit reprehenderit eum culpa voluptates harum sapiente nesciunt ratione.</p>"
+
+_RECORD_NEW = _record(
+    "recNewRecordId",
+    title="Red! It's the new blue!",
+    description="Red is a scientifically proven color that moves faster than all other colors.",
+    external_link="https://example.com/",
+    is_active=True,
+    rating="1.5",
+    long_description=_LONG_DESCRIPTION,
+    points=95,
+    slug="red-its-new-blue",
+)
+
+_RECORD_DELETE_ME = _record(
+    "recNewRecordId",
+    title="Red! It's the new blue!",
+    description="Red is a scientifically proven color that moves faster than all other colors.",
+    external_link="https://example.com/",
+    is_active=True,
+    rating="1.5",
+    long_description=_LONG_DESCRIPTION,
+    points=95,
+    slug="delete-me",
+    publications=(
+        MappingProxyType({"title": "Record 1 publication 1"}),
+        MappingProxyType({"title": "Record 1 publication 2"}),
+        MappingProxyType({"title": "Record 1 publication 3"}),
+    ),
+)
+
+_RECORD_DIFFERENT = _record(
+    "Different record",
+    title="Not the used record.",
+    description="This is only used for multiple responses from MockAirtable",
+    external_link="https://example.com/",
+    is_active=False,
+    rating="5.5",
+    long_description="",
+    points=1,
+    slug="not-the-used-record",
+)
+
+_RECORD_THREE = _record(
+    "recRecordThree",
+    title="A third record.",
+    description="This is only used for multiple responses from MockAirtable",
+    external_link="https://example.com/",
+    is_active=False,
+    rating="5.5",
+    long_description="",
+    points=1,
+    slug="record-3",
+)
+
+_RECORD_FOUR = _record(
+    "recRecordFour",
+    title="A fourth record.",
+    description="This is only used for multiple responses from MockAirtable",
+    external_link="https://example.com/",
+    is_active=False,
+    rating="5.5",
+    long_description="",
+    points=1,
+    slug="record-4",
+    publications=(
+        MappingProxyType({"title": "Record 4 publication 1"}),
+        MappingProxyType({"title": "Record 4 publication 2"}),
+        MappingProxyType({"title": "Record 4 publication 3"}),
+    ),
+)
+
+_MATCHING_RECORD = _record(
+    "recMatchedRecordId",
+    title="Red! It's the new blue!",
+    description="Red is a scientifically proven color that moves faster than all other colors.",
+    external_link="https://example.com/",
+    is_active=True,
+    rating="1.5",
+    long_description=_LONG_DESCRIPTION,
+    points=95,
+    slug="a-matching-slug",
+)
+
+_HOME_RECORD = _record(
+    "recHomePageId",
+    **{
+        "title": "Home",
+        "Page Slug": "home",
+        "intro": "This is the home page.",
+    },
+)
+
+_ALL_RECORDS = (_RECORD_DELETE_ME, _RECORD_DIFFERENT, _RECORD_THREE, _RECORD_FOUR)
+
+# Results for Table.get(record_id)
+_RECORDS_BY_ID = {
+    "recNewRecordId": _RECORD_NEW,
+}
+
+# Results for Table.all(formula=...), keyed by the formula string.
+_RECORDS_BY_FORMULA = {
+    match({"slug": "red-its-new-blue"}): (_RECORD_NEW, _RECORD_DIFFERENT),
+    match({"slug": "a-matching-slug"}): (_MATCHING_RECORD,),
+    match({"Page Slug": "home"}): (_HOME_RECORD,),
+}
+
+_DELETED_RECORD = MappingProxyType({"deleted": True, "record": "recNewRecordId"})
+
+
+def _build_mock_airtable():
     class MockTable(mock.Mock):
         def iterate(self):
             return [self.all()]
 
-
     MockTable.table_name = "app_airtable_advert_base_key"
 
-    MockTable.get = mock.MagicMock("get")
-
-    def get_fn(record_id):
-        if record_id == "recNewRecordId":
-            return {
-                "id": "recNewRecordId",
-                "fields": {
-                    "title": "Red! It's the new blue!",
-                    "description": "Red is a scientifically proven color that moves faster than all other colors.",
-                    "external_link": "https://example.com/",
-                    "is_active": True,
-                    "rating": "1.5",
-                    "long_description": "<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit. Veniam laboriosam consequatur saepe. Repellat itaque dolores neque, impedit reprehenderit eum culpa voluptates harum sapiente nesciunt ratione.</p>",
-                    "points": 95,
-                    "slug": "red-its-new-blue",
-                },
-            }
-        else:
-            raise HTTPError("404 Client Error: Not Found")
-
-    MockTable.get.side_effect = get_fn
-
-    MockTable.create = mock.MagicMock("create")
-
-    MockTable.create.return_value = {
-        "id": "recNewRecordId",
-        "fields": {
-            "title": "Red! It's the new blue!",
-            "description": "Red is a scientifically proven color that moves faster than all other colors.",
-            "external_link": "https://example.com/",
-            "is_active": True,
-            "rating": "1.5",
-            "long_description": "<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit. Veniam laboriosam consequatur saepe. Repellat itaque dolores neque, impedit reprehenderit eum culpa voluptates harum sapiente nesciunt ratione.</p>",
-            "points": 95,
-            "slug": "red-its-new-blue",
-        },
-    }
-
-    MockTable.update = mock.MagicMock("update")
-    MockTable.update.return_value = {
-        "id": "recNewRecordId",
-        "fields": {
-            "title": "Red! It's the new blue!",
-            "description": "Red is a scientifically proven color that moves faster than all other colors.",
-            "external_link": "https://example.com/",
-            "is_active": True,
-            "rating": "1.5",
-            "long_description": "<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit. Veniam laboriosam consequatur saepe. Repellat itaque dolores neque, impedit reprehenderit eum culpa voluptates harum sapiente nesciunt ratione.</p>",
-            "points": 95,
-            "slug": "red-its-new-blue",
-        },
-    }
-
-    MockTable.delete = mock.MagicMock("delete")
-    MockTable.delete.return_value = {"deleted": True, "record": "recNewRecordId"}
-
-    MockTable.all = mock.MagicMock("all")
-    def all_fn(formula=None):
-        if formula is None:
-            return [
-                {
-                    "id": "recNewRecordId",
-                    "fields": {
-                        "title": "Red! It's the new blue!",
-                        "description": "Red is a scientifically proven color that moves faster than all other colors.",
-                        "external_link": "https://example.com/",
-                        "is_active": True,
-                        "rating": "1.5",
-                        "long_description": "<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit. Veniam laboriosam consequatur saepe. Repellat itaque dolores neque, impedit reprehenderit eum culpa voluptates harum sapiente nesciunt ratione.</p>",
-                        "points": 95,
-                        "slug": "delete-me",
-                        "publications": [
-                            {"title": "Record 1 publication 1"},
-                            {"title": "Record 1 publication 2"},
-                            {"title": "Record 1 publication 3"},
-                        ]
-                    },
-                },
-                {
-                    "id": "Different record",
-                    "fields": {
-                        "title": "Not the used record.",
-                        "description": "This is only used for multiple responses from MockAirtable",
-                        "external_link": "https://example.com/",
-                        "is_active": False,
-                        "rating": "5.5",
-                        "long_description": "",
-                        "points": 1,
-                        "slug": "not-the-used-record",
-                    },
-                },
-                {
-                    "id": "recRecordThree",
-                    "fields": {
-                        "title": "A third record.",
-                        "description": "This is only used for multiple responses from MockAirtable",
-                        "external_link": "https://example.com/",
-                        "is_active": False,
-                        "rating": "5.5",
-                        "long_description": "",
-                        "points": 1,
-                        "slug": "record-3",
-                    },
-                },
-                {
-                    "id": "recRecordFour",
-                    "fields": {
-                        "title": "A fourth record.",
-                        "description": "This is only used for multiple responses from MockAirtable",
-                        "external_link": "https://example.com/",
-                        "is_active": False,
-                        "rating": "5.5",
-                        "long_description": "",
-                        "points": 1,
-                        "slug": "record-4",
-                        "publications": [
-                            {"title": "Record 4 publication 1"},
-                            {"title": "Record 4 publication 2"},
-                            {"title": "Record 4 publication 3"},
-                        ]
-                    },
-                },
-            ]
-        elif formula == match({"slug": "red-its-new-blue"}):
-            return [
-                {
-                    "id": "recNewRecordId",
-                    "fields": {
-                        "title": "Red! It's the new blue!",
-                        "description": "Red is a scientifically proven color that moves faster than all other colors.",
-                        "external_link": "https://example.com/",
-                        "is_active": True,
-                        "rating": "1.5",
-                        "long_description": "<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit. Veniam laboriosam consequatur saepe. Repellat itaque dolores neque, impedit reprehenderit eum culpa voluptates harum sapiente nesciunt ratione.</p>",
-                        "points": 95,
-                        "slug": "red-its-new-blue",
-                    },
-                },
-                {
-                    "id": "Different record",
-                    "fields": {
-                        "title": "Not the used record.",
-                        "description": "This is only used for multiple responses from MockAirtable",
-                        "external_link": "https://example.com/",
-                        "is_active": False,
-                        "rating": "5.5",
-                        "long_description": "",
-                        "points": 1,
-                        "slug": "not-the-used-record",
-                    },
-                },
-            ]
-        elif formula == match({"slug": "a-matching-slug"}):
-            return [
-                {
-                    "id": "recMatchedRecordId",
-                    "fields": {
-                        "title": "Red! It's the new blue!",
-                        "description": "Red is a scientifically proven color that moves faster than all other colors.",
-                        "external_link": "https://example.com/",
-                        "is_active": True,
-                        "rating": "1.5",
-                        "long_description": "<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit. Veniam laboriosam consequatur saepe. Repellat itaque dolores neque, impedit reprehenderit eum culpa voluptates harum sapiente nesciunt ratione.</p>",
-                        "points": 95,
-                        "slug": "a-matching-slug",
-                    },
-                },
-            ]
-        elif formula == match({"Page Slug": "home"}):
-            return [
-                {
-                    "id": "recHomePageId",
-                    "fields": {
-                        "title": "Home",
-                        "Page Slug": "home",
-                        "intro": "This is the home page.",
-                    },
-                },
-            ]
-        else:
-            return []
-
-    MockTable.all.side_effect = all_fn
-
     class MockApi(mock.Mock):
         def __init__(self, *args, **kwargs):
             super().__init__(*args, **kwargs)
@@ -207,4 +140,44 @@ def get_mock_airtable():
         def table(self, base_id, table_name):
             return self._table
 
-    return MockApi
\ No newline at end of file
+    # Each patched Api gets its own table methods, so their call histories stay separate.
+    MockApi.MockTable = MockTable
+    return MockApi
+
+
+def get_fn(record_id):
+    try:
+        return _RECORDS_BY_ID[record_id]
+    except KeyError:
+        raise HTTPError("404 Client Error: Not Found")
+
+
+def all_fn(formula=None):
+    # The results are immutable, so they can be handed out without copying.
+    if formula is None:
+        return _ALL_RECORDS
+    return _RECORDS_BY_FORMULA.get(formula, ())
+
+
+def reset_mock_airtable(mock_api):
+    """
+    Put a mock Airtable API's table methods back to their default responses, with no call history.
+
+    The table methods are shared by every table the mock API returns, so this needs to
+    run before each test when a patch is started once for a whole test class.
+    """
+    MockTable = mock_api.MockTable
+    MockTable.get = mock.Mock(side_effect=get_fn)
+    MockTable.create = mock.Mock(return_value=_RECORD_NEW)
+    MockTable.update = mock.Mock(return_value=_RECORD_NEW)
+    MockTable.delete = mock.Mock(return_value=_DELETED_RECORD)
+    MockTable.all = mock.Mock(side_effect=all_fn)
+
+
+def get_mock_airtable():
+    """
+    Return a new mock Airtable API class, with its own table methods.
+    """
+    MockApi = _build_mock_airtable()
+    reset_mock_airtable(MockApi)
+    return MockApi
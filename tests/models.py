@@ -35,19 +35,20 @@ class Publication(models.Model):
     title = models.CharField(max_length=30)
 
 
-class Advert(AirtableMixin, models.Model):
-    STAR_RATINGS = (
-        (1.0, "1"),
-        (1.5, "1.5"),
-        (2.0, "2"),
-        (2.5, "2.5"),
-        (3.0, "3"),
-        (3.5, "3.5"),
-        (4.0, "4"),
-        (4.5, "4.5"),
-        (5.0, "5"),
-    )
+STAR_RATINGS = (
+    (1.0, "1"),
+    (1.5, "1.5"),
+    (2.0, "2"),
+    (2.5, "2.5"),
+    (3.0, "3"),
+    (3.5, "3.5"),
+    (4.0, "4"),
+    (4.5, "4.5"),
+    (5.0, "5"),
+)
 
+
+class Advert(AirtableMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     external_link = models.URLField(blank=True, max_length=500)
@@ -60,34 +61,27 @@ class Advert(AirtableMixin, models.Model):
     slug = models.SlugField(max_length=100, unique=True, editable=True)
     publications = models.ManyToManyField(Publication, blank=True)
 
+    # The Airtable columns share their names with the model fields.
+    _EXPORT_FIELD_NAMES = (
+        "title",
+        "description",
+        "external_link",
+        "is_active",
+        "rating",
+        "long_description",
+        "points",
+        "slug",
+        "publications",
+    )
+    _IMPORT_FIELD_MAP = {name: name for name in _EXPORT_FIELD_NAMES}
+
     @classmethod
     def map_import_fields(cls):
         """{'Airtable column name': 'model_field_name', ...}"""
-        mappings = {
-            "title": "title",
-            "description": "description",
-            "external_link": "external_link",
-            "is_active": "is_active",
-            "rating": "rating",
-            "long_description": "long_description",
-            "points": "points",
-            "slug": "slug",
-            "publications": "publications",
-        }
-        return mappings
+        return cls._IMPORT_FIELD_MAP
 
     def get_export_fields(self):
-        return {
-            "title": self.title,
-            "description": self.description,
-            "external_link": self.external_link,
-            "is_active": self.is_active,
-            "rating": self.rating,
-            "long_description": self.long_description,
-            "points": self.points,
-            "slug": self.slug,
-            "publications": self.publications,
-        }
+        return {name: getattr(self, name) for name in self._EXPORT_FIELD_NAMES}
 
     class Meta:
         verbose_name = "Advertisement"
@@ -3,6 +3,8 @@ from rest_framework import serializers
 
 from wagtail_airtable.serializers import AirtableSerializer
 
+from .models import Publication
+
 
 class PublicationsObjectsSerializer(serializers.RelatedField):
     """
@@ -19,13 +21,17 @@ class PublicationsObjectsSerializer(serializers.RelatedField):
     """
 
     def to_internal_value(self, data):
-        from .models import Publication
-        publications = []
         if data:
-            for publication in data:
-                publication_obj, _ = Publication.objects.get_or_create(title=publication["title"])
-                publications.append(publication_obj)
-            return publications
+            titles = [publication["title"] for publication in data]
+            # Fetch the existing publications in one query, and create any missing ones in another,
+            # instead of a get_or_create() per publication.
+            existing = {}
+            for publication in Publication.objects.filter(title__in=titles).order_by("pk"):
+                existing.setdefault(publication.title, publication)
+            missing = [Publication(title=title) for title in dict.fromkeys(titles) if title not in existing]
+            for publication in Publication.objects.bulk_create(missing):
+                existing[publication.title] = publication
+            return [existing[title] for title in titles]
         return data
 
     def get_queryset(self):
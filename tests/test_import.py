@@ -1,24 +1,42 @@
-import copy
+import datetime
+import time
+
 from django.conf import settings
-from django.test import TestCase, override_settings
-from unittest.mock import MagicMock, patch
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers
+from unittest.mock import MagicMock, PropertyMock, patch
 from wagtail import hooks
 from wagtail.models import Page
 
-from tests.models import Advert, ModelNotUsed, SimilarToAdvert, SimplePage
+from tests.models import Advert, ModelNotUsed, Publication, SimilarToAdvert, SimplePage
 from tests.serializers import AdvertSerializer
 from wagtail_airtable.importer import AirtableModelImporter, get_column_to_field_names, convert_mapped_fields, get_data_for_new_model
 
-from .mock_airtable import get_mock_airtable
+from .mock_airtable import get_mock_airtable, reset_mock_airtable
 
 
-class TestImportClass(TestCase):
-    fixtures = ['test.json']
+def override_model_settings(label, **model_settings):
+    """
+    Override some of one model's AIRTABLE_IMPORT_SETTINGS, copying only the dicts that change.
+    """
+    airtable_settings = {**settings.AIRTABLE_IMPORT_SETTINGS}
+    airtable_settings[label] = {**airtable_settings[label], **model_settings}
+    return override_settings(AIRTABLE_IMPORT_SETTINGS=airtable_settings)
 
-    def setUp(self):
+
+class TestImportHelpers(SimpleTestCase):
+    """Importer tests that don't need the database."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
         airtable_patcher = patch("wagtail_airtable.importer.Api", new_callable=get_mock_airtable())
-        self.mock_airtable = airtable_patcher.start()
-        self.addCleanup(airtable_patcher.stop)
+        airtable_patcher.start()
+        cls.addClassCleanup(airtable_patcher.stop)
+        # Only inspected, never run, so it can be shared between tests.
+        cls.advert_importer = AirtableModelImporter(model=Advert)
 
     def get_valid_record_fields(self):
         """Common used method for standard valid airtable records."""
@@ -44,11 +62,46 @@ class TestImportClass(TestCase):
         }
 
     def test_get_model_serializer(self):
-        self.assertEqual(AirtableModelImporter(model=Advert).model_serializer, AdvertSerializer)
+        self.assertEqual(self.advert_importer.model_serializer, AdvertSerializer)
+
+    def test_field_is_m2m(self):
+        self.assertEqual(self.advert_importer.m2m_field_names, {"publications"})
+        self.assertTrue(self.advert_importer.field_is_m2m("publications"))
+        self.assertFalse(self.advert_importer.field_is_m2m("title"))
+
+    def test_iterate_pages(self):
+        importer = AirtableModelImporter(model=Advert)
+        pages = [[{"id": "rec1"}, {"id": "rec2"}], [], [{"id": "rec3"}]]
+        with patch.object(importer.airtable_client, "iterate", return_value=iter(pages)):
+            self.assertEqual(list(importer.iterate_pages()), pages)
+
+    def test_iterate_pages_stopped_early(self):
+        importer = AirtableModelImporter(model=Advert)
+        fetched = []
+
+        def iterate():
+            for page_number in range(3):
+                time.sleep(0.05)
+                fetched.append(page_number)
+                yield [{"id": "rec%s" % page_number}]
+
+        with patch.object(importer.airtable_client, "iterate", return_value=iterate()):
+            pages = importer.iterate_pages()
+            next(pages)
+            pages.close()
+        fetched_when_closed = list(fetched)
+
+        # The request for the second page was either cancelled or finished, not left running.
+        time.sleep(0.1)
+        self.assertEqual(fetched, fetched_when_closed)
+
+    def test_shared_api(self):
+        importer = AirtableModelImporter(model=SimilarToAdvert, api=self.advert_importer.api)
+        self.assertIs(importer.api, self.advert_importer.api)
 
     def test_get_model_settings(self):
         # Finds config settings
-        self.assertDictEqual(AirtableModelImporter(model=Advert).model_settings, settings.AIRTABLE_IMPORT_SETTINGS['tests.Advert'])
+        self.assertDictEqual(self.advert_importer.model_settings, settings.AIRTABLE_IMPORT_SETTINGS['tests.Advert'])
 
         # Does not find config settings
         with self.assertRaises(KeyError):
@@ -73,6 +126,9 @@ class TestImportClass(TestCase):
         column, field = get_column_to_field_names(None)
         self.assertEqual(column, None)
         self.assertEqual(field, None)
+        # An empty dictionary has no column to use
+        with self.assertRaises(ValueError):
+            get_column_to_field_names({})
 
     def test_convert_mapped_fields(self):
         record_fields_dict = self.get_valid_record_fields()
@@ -95,6 +151,32 @@ class TestImportClass(TestCase):
         # passed into the newly mapped fields
         self.assertFalse(hasattr(mapped_fields, 'extra_field_from_airtable'))
 
+    def test_get_data_for_new_model(self):
+        mapped_fields = convert_mapped_fields(
+            self.get_valid_record_fields(),
+            self.get_valid_mapped_fields(),
+        )
+
+        data_for_new_model = get_data_for_new_model(mapped_fields, 'recSomeRecordId')
+        self.assertTrue(data_for_new_model.get('airtable_record_id'))
+        self.assertEqual(data_for_new_model['airtable_record_id'], 'recSomeRecordId')
+        self.assertIsNone(data_for_new_model.get('id'))
+        self.assertIsNone(data_for_new_model.get('pk'))
+
+
+class TestImportClass(TestCase):
+    fixtures = ['test.json']
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        airtable_patcher = patch("wagtail_airtable.importer.Api", new_callable=get_mock_airtable())
+        cls.mock_airtable = airtable_patcher.start()
+        cls.addClassCleanup(airtable_patcher.stop)
+
+    def setUp(self):
+        reset_mock_airtable(self.mock_airtable)
+
     def test_update_object(self):
         importer = AirtableModelImporter(model=Advert)
         advert = Advert.objects.get(airtable_record_id="recNewRecordId")
@@ -147,11 +229,117 @@ class TestImportClass(TestCase):
         self.assertIsNone(created_result.errors)
 
         advert = Advert.objects.get(airtable_record_id=created_result.record_id)
+        self.assertEqual(created_result.instance, advert)
         hook_fn.assert_called_once_with(instance=advert, is_wagtail_page=False, record_id="test-created-id")
         self.assertEqual(advert.title, "The created one")
         self.assertEqual(advert.slug, "test-created")
         self.assertEqual(len(advert.publications.all()), 3)
 
+    def test_bulk_import(self):
+        advert = Advert.objects.get(airtable_record_id="recNewRecordId")
+        advert.publications.add(Publication.objects.create(title="Removed by the import"))
+        with override_model_settings('tests.Advert', AIRTABLE_IMPORT_BULK_BATCH_SIZE=100):
+            importer = AirtableModelImporter(model=Advert)
+            hook_fn = MagicMock()
+            with hooks.register_temporarily("airtable_import_record_updated", hook_fn):
+                results = list(importer.run())
+
+        self.assertEqual([result.record_id for result in results], [
+            "recNewRecordId", "Different record", "recRecordThree", "recRecordFour",
+        ])
+        self.assertEqual([result.new for result in results], [False, True, True, True])
+        self.assertTrue(all(result.errors is None for result in results))
+        self.assertEqual(hook_fn.call_count, 4)
+
+        advert.refresh_from_db()
+        self.assertEqual(advert.slug, "delete-me")
+        self.assertEqual(sorted(advert.publications.values_list("title", flat=True)), [
+            "Record 1 publication 1", "Record 1 publication 2", "Record 1 publication 3",
+        ])
+        created = Advert.objects.get(airtable_record_id="recRecordFour")
+        self.assertEqual(created.title, "A fourth record.")
+        self.assertEqual(created.publications.count(), 3)
+
+    def test_failed_bulk_import_rolls_back_the_page(self):
+        with override_model_settings('tests.Advert', AIRTABLE_IMPORT_BULK_BATCH_SIZE=100):
+            importer = AirtableModelImporter(model=Advert)
+            with patch.object(importer, "set_m2m_values_in_bulk", side_effect=ValueError("Failed")):
+                results = list(importer.run())
+
+        self.assertTrue(all(result.errors for result in results))
+        self.assertFalse(Advert.objects.filter(airtable_record_id="recRecordFour").exists())
+        # Including the publications created while validating the records
+        self.assertFalse(Publication.objects.filter(title__startswith="Record 4").exists())
+
+    def test_bulk_import_without_records_does_not_query(self):
+        self.mock_airtable._table.all.side_effect = None
+        self.mock_airtable._table.all.return_value = []
+        with override_model_settings('tests.Advert', AIRTABLE_IMPORT_BULK_BATCH_SIZE=100):
+            importer = AirtableModelImporter(model=Advert)
+            with self.assertNumQueries(0):
+                self.assertEqual(list(importer.run()), [])
+
+    def test_bulk_import_not_allowed_for_pages(self):
+        with override_model_settings('tests.SimplePage', AIRTABLE_IMPORT_BULK_BATCH_SIZE=100):
+            with self.assertRaises(ImproperlyConfigured):
+                AirtableModelImporter(model=SimplePage)
+
+    def test_bulk_import_not_allowed_without_returned_primary_keys(self):
+        with override_model_settings('tests.Advert', AIRTABLE_IMPORT_BULK_BATCH_SIZE=100):
+            with patch.object(
+                type(connection.features), "can_return_rows_from_bulk_insert", PropertyMock(return_value=False)
+            ):
+                with self.assertRaises(ImproperlyConfigured):
+                    AirtableModelImporter(model=Advert)
+
+    def test_bulk_import_merges_records_with_the_same_unique_identifier(self):
+        self.mock_airtable._table.all.side_effect = None
+        self.mock_airtable._table.all.return_value = [
+            {"id": "recFirst", "fields": {"title": "First", "slug": "duplicate-slug"}},
+            {"id": "recSecond", "fields": {"title": "Second", "slug": "duplicate-slug"}},
+        ]
+        with override_model_settings('tests.Advert', AIRTABLE_IMPORT_BULK_BATCH_SIZE=100):
+            importer = AirtableModelImporter(model=Advert)
+            results = list(importer.run())
+
+        # Like the per-record import, the second record updates the object created for the first.
+        self.assertEqual([result.errors for result in results], [None, None])
+        self.assertEqual([result.new for result in results], [True, False])
+        advert = Advert.objects.get(slug="duplicate-slug")
+        self.assertEqual(advert.title, "Second")
+        self.assertEqual(advert.airtable_record_id, "recSecond")
+
+    def test_bulk_import_does_not_update_primary_keys(self):
+        class AdvertSerializerWithId(AdvertSerializer):
+            id = serializers.IntegerField(required=False)
+
+        advert = Advert.objects.get(airtable_record_id="recNewRecordId")
+        self.mock_airtable._table.all.side_effect = None
+        self.mock_airtable._table.all.return_value = [{
+            "id": "recNewRecordId",
+            "fields": {"Wagtail ID": advert.pk, "title": "Updated title", "slug": advert.slug},
+        }]
+        with override_model_settings('tests.Advert', AIRTABLE_IMPORT_BULK_BATCH_SIZE=100):
+            importer = AirtableModelImporter(model=Advert)
+            importer.model_serializer = AdvertSerializerWithId
+            importer.mapped_import_fields = {**importer.mapped_import_fields, "Wagtail ID": "id"}
+            result = next(importer.run())
+
+        self.assertIsNone(result.errors)
+        advert.refresh_from_db()
+        self.assertEqual(advert.title, "Updated title")
+
+    def test_serializer_context_is_shared_between_records(self):
+        importer = AirtableModelImporter(model=Advert)
+        importer.model_serializer = MagicMock(wraps=AdvertSerializer)
+
+        results = list(importer.run())
+
+        self.assertEqual(importer.model_serializer.call_count, len(results))
+        for call in importer.model_serializer.call_args_list:
+            self.assertIs(call.kwargs["context"], importer.serializer_context)
+        self.assertIs(importer.serializer_context["importer"], importer)
+
     def test_update_object_with_invalid_serialized_data(self):
         advert = Advert.objects.get(airtable_record_id="recNewRecordId")
         importer = AirtableModelImporter(model=Advert)
@@ -183,21 +371,95 @@ class TestImportClass(TestCase):
         self.assertEqual(importer.airtable_unique_identifier_field_name, "slug")
         self.assertEqual(importer.get_existing_instance("nothing", advert.slug), advert)
 
+        # Blank identifiers only look up the record ID
+        Advert.objects.filter(pk=advert.pk).update(slug="")
+        with self.assertNumQueries(2):
+            self.assertIsNone(importer.get_existing_instance("nothing", ""))
+            self.assertIsNone(importer.get_existing_instance("nothing", None))
+
+    def test_get_existing_instance_after_prefetch(self):
+        importer = AirtableModelImporter(model=Advert)
+        advert = Advert.objects.get(airtable_record_id="recNewRecordId")
+        records = [
+            {"id": "recNewRecordId", "fields": {}},
+            {"id": "nothing", "fields": {"slug": advert.slug}},
+            {"id": "recUnknown", "fields": {"slug": "unknown-slug"}},
+        ]
+
+        with self.assertNumQueries(2):
+            importer.prefetch_existing_instances(records)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(importer.get_existing_instance("recNewRecordId", None), advert)
+            self.assertEqual(importer.get_existing_instance("nothing", advert.slug), advert)
+            self.assertIsNone(importer.get_existing_instance("recUnknown", "unknown-slug"))
+
+    def test_failed_update_is_not_reused_from_the_prefetch(self):
+        importer = AirtableModelImporter(model=Advert)
+        advert = Advert.objects.get(airtable_record_id="recNewRecordId")
+        record = {"id": "recNewRecordId", "fields": {"title": "New title", "slug": advert.slug}}
+        importer.prefetch_existing_instances([record, record])
+
+        def update_object(instance, record_id, data):
+            instance.title = "Half applied"
+            raise ValueError("Failed part way through")
+
+        with patch.object(importer, "update_object", side_effect=update_object):
+            self.assertIsNotNone(importer.process_record(record).errors)
+
+        # The next record gets a fresh instance rather than the half updated one.
+        self.assertEqual(importer.get_existing_instance("recNewRecordId", advert.slug).title, advert.title)
+
+    def test_prefetched_instance_follows_an_updated_unique_identifier(self):
+        importer = AirtableModelImporter(model=Advert)
+        advert = Advert.objects.get(airtable_record_id="recNewRecordId")
+        old_slug = advert.slug
+        record = {"id": "recNewRecordId", "fields": {"title": "New title", "slug": "renamed-slug"}}
+        importer.prefetch_existing_instances([record, {"id": "recOther", "fields": {"slug": old_slug}}])
+
+        self.assertIsNone(importer.process_record(record).errors)
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(importer.get_existing_instance("recOther", old_slug))
+            self.assertEqual(importer.get_existing_instance("recOther", "renamed-slug"), advert)
+
+    def test_process_record_after_run(self):
+        importer = AirtableModelImporter(model=Advert)
+        list(importer.run())
+        advert = Advert(title="Not imported", slug="not-imported")
+        advert.push_to_airtable = False
+        advert.save()
+
+        # The instances prefetched for the last page don't hide the rest of the database.
+        self.assertEqual(importer.get_existing_instance("recUnknown", advert.slug), advert)
+        result = importer.process_record({"id": "recUnknown", "fields": {"title": "Imported", "slug": advert.slug}})
+        self.assertIsNone(result.errors)
+        self.assertFalse(result.new)
+        advert.refresh_from_db()
+        self.assertEqual(advert.title, "Imported")
+
     def test_is_wagtail_page(self):
         self.assertTrue(AirtableModelImporter(SimplePage).model_is_page)
         self.assertFalse(AirtableModelImporter(Advert).model_is_page)
 
-    def test_get_data_for_new_model(self):
-        mapped_fields = convert_mapped_fields(
-            self.get_valid_record_fields(),
-            self.get_valid_mapped_fields(),
-        )
+    def test_parent_page_is_loaded_lazily(self):
+        with self.assertNumQueries(0):
+            importer = AirtableModelImporter(model=SimplePage)
+        self.assertEqual(importer.parent_page, Page.objects.get(slug="home"))
+        self.assertIsNone(AirtableModelImporter(model=Advert).parent_page)
 
-        data_for_new_model = get_data_for_new_model(mapped_fields, 'recSomeRecordId')
-        self.assertTrue(data_for_new_model.get('airtable_record_id'))
-        self.assertEqual(data_for_new_model['airtable_record_id'], 'recSomeRecordId')
-        self.assertIsNone(data_for_new_model.get('id'))
-        self.assertIsNone(data_for_new_model.get('pk'))
+    def test_invalid_parent_page_stops_the_import(self):
+        self.mock_airtable._table.all.side_effect = None
+        self.mock_airtable._table.all.return_value = [
+            {"id": "recFirstPage", "fields": {"title": "First", "Page Slug": "first", "intro": "Intro"}},
+            {"id": "recSecondPage", "fields": {"title": "Second", "Page Slug": "second", "intro": "Intro"}},
+        ]
+        with override_model_settings('tests.SimplePage', PARENT_PAGE_ID=999999):
+            importer = AirtableModelImporter(model=SimplePage)
+            with self.assertRaises(Page.DoesNotExist):
+                list(importer.run())
+        # Nothing was fetched from Airtable, let alone written.
+        self.mock_airtable._table.all.assert_not_called()
 
     @patch('wagtail_airtable.mixins.Api')
     def test_create_page(self, mixin_airtable):
@@ -229,9 +491,7 @@ class TestImportClass(TestCase):
 
     @patch('wagtail_airtable.mixins.Api')
     def test_create_and_publish_page(self, mixin_airtable):
-        new_settings = copy.deepcopy(settings.AIRTABLE_IMPORT_SETTINGS)
-        new_settings['tests.SimplePage']['AUTO_PUBLISH_NEW_PAGES'] = True
-        with override_settings(AIRTABLE_IMPORT_SETTINGS=new_settings):
+        with override_model_settings('tests.SimplePage', AUTO_PUBLISH_NEW_PAGES=True):
             importer = AirtableModelImporter(model=SimplePage)
             self.assertEqual(Page.objects.get(slug="home").get_children().count(), 0)
 
@@ -286,8 +546,9 @@ class TestImportClass(TestCase):
         self.assertFalse(updated_result.new)
         self.assertIsNone(updated_result.errors)
 
-        page.refresh_from_db()
+        self.assertEqual(updated_result.instance, page)
         hook_fn.assert_called_once_with(instance=page, is_wagtail_page=True, record_id="test-created-page-id")
+        page.refresh_from_db()
         self.assertEqual(page.title, "A simple page")
         self.assertEqual(page.slug, "a-simple-page")
         self.assertEqual(page.intro, "How much more simple can it get? Oh, actually it can get more simple.")
@@ -317,13 +578,35 @@ class TestImportClass(TestCase):
         }]
         hook_fn = MagicMock()
         with hooks.register_temporarily("airtable_import_record_updated", hook_fn):
-            updated_result = next(importer.run())
+            with patch.object(SimplePage, "to_json") as to_json:
+                updated_result = next(importer.run())
         self.assertFalse(updated_result.new)
         self.assertIsNone(updated_result.errors)
         hook_fn.assert_not_called()
+        # Unchanged values are found without serializing the whole page
+        to_json.assert_not_called()
 
         self.assertEqual(page.revisions.count(), 0)
 
+    @patch('wagtail_airtable.mixins.Api')
+    def test_skip_update_page_if_only_the_datetime_format_changed(self, mixin_airtable):
+        importer = AirtableModelImporter(model=SimplePage)
+        go_live_at = datetime.datetime(2030, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+        page = SimplePage(title="A simple page", slug="a-simple-page", intro="Intro", go_live_at=go_live_at)
+        page.push_to_airtable = False
+        Page.objects.get(slug="home").add_child(instance=page)
+
+        # The same time as a naive datetime in the default time zone (UTC)
+        self.assertFalse(importer.update_object(
+            instance=page, record_id="test-page-id", data={"go_live_at": go_live_at.replace(tzinfo=None)},
+        ))
+        self.assertEqual(page.revisions.count(), 0)
+
+        self.assertTrue(importer.update_object(
+            instance=page, record_id="test-page-id", data={"go_live_at": go_live_at + datetime.timedelta(days=1)},
+        ))
+        self.assertEqual(page.revisions.count(), 1)
+
     @patch('wagtail_airtable.mixins.Api')
     def test_skip_update_page_if_locked(self, mixin_airtable):
         importer = AirtableModelImporter(model=SimplePage)
@@ -1,28 +1,40 @@
-from copy import copy
-
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 from pyairtable.formulas import match
 
 from tests.models import Advert, SimplePage
 from wagtail_airtable.mixins import AirtableMixin
 from unittest.mock import ANY, patch
-from .mock_airtable import get_mock_airtable
+from .mock_airtable import get_mock_airtable, reset_mock_airtable
+
+
+ERROR_401 = "401 Client Error: Unauthorized for url: https://api.airtable.com/v0/appYourAppId/Your%20Table?filterByFormula=.... [Error: {'type': 'AUTHENTICATION_REQUIRED', 'message': 'Authentication required'}]"
+ERROR_404_NOT_FOUND = "404 Client Error: Not Found for url: https://api.airtable.com/v0/app3dozZtsCotiIpf/Brokerages/nope [Error: NOT_FOUND]"
+ERROR_404_TABLE_NOT_FOUND = "404 Client Error: Not Found for url: https://api.airtable.com/v0/app3dozZtsCotiIpf/Brokerages%2022 [Error: {'type': 'TABLE_NOT_FOUND', 'message': 'Could not find table table_name in appxxxxx'}]"
 
 
 class TestAirtableModel(TestCase):
     fixtures = ['test.json']
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
         airtable_patcher = patch("wagtail_airtable.mixins.Api", new_callable=get_mock_airtable())
-        airtable_patcher.start()
-        self.addCleanup(airtable_patcher.stop)
+        cls.mock_airtable = airtable_patcher.start()
+        cls.addClassCleanup(airtable_patcher.stop)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.get(username='admin')
+        cls.advert = Advert.objects.first()
 
-        self.client.login(username='admin', password='password')
-        self.advert = Advert.objects.first()
+    def setUp(self):
+        reset_mock_airtable(self.mock_airtable)
+        self.client.force_login(self.admin_user)
 
     def test_model_connection_settings(self):
         # Make sure the settings are being passed into the model after .setup_airtable() is called
-        advert = copy(self.advert)
+        advert = self.advert
         advert.setup_airtable()
         self.assertEqual(advert.AIRTABLE_BASE_KEY, 'app_airtable_advert_base_key')
         self.assertEqual(advert.AIRTABLE_TABLE_NAME, 'Advert Table Name')
@@ -33,7 +45,7 @@ class TestAirtableModel(TestCase):
         # Make sure instances are not instantiated with Airtable settings.
         # By preventing automatic Airtable API instantiation we can avoid
         # holding an Airtable API object on every model instance in Wagtail List views.
-        advert = copy(self.advert)
+        advert = self.advert
         self.assertEqual(advert.AIRTABLE_BASE_KEY, None)
         self.assertEqual(advert.AIRTABLE_TABLE_NAME, None)
         self.assertEqual(advert.AIRTABLE_UNIQUE_IDENTIFIER, None)
@@ -174,13 +186,18 @@ class TestAirtableModel(TestCase):
 class TestAirtableMixin(TestCase):
     fixtures = ['test.json']
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
         airtable_patcher = patch("wagtail_airtable.mixins.Api", new_callable=get_mock_airtable())
-        self.mock_airtable = airtable_patcher.start()
-        self.addCleanup(airtable_patcher.stop)
+        cls.mock_airtable = airtable_patcher.start()
+        cls.addClassCleanup(airtable_patcher.stop)
+
+    def setUp(self):
+        reset_mock_airtable(self.mock_airtable)
 
     def test_setup_airtable(self):
-        advert = copy(Advert.objects.first())
+        advert = Advert.objects.first()
         self.assertFalse(advert._ran_airtable_setup)
         self.assertFalse(advert._is_enabled)
         self.assertFalse(advert._push_to_airtable)
@@ -198,47 +215,45 @@ class TestAirtableMixin(TestCase):
 
     def test_delete_record(self):
         advert = Advert.objects.get(airtable_record_id='recNewRecordId')
-        advert.setup_airtable()
-        deleted = advert.delete_record()
+        with self.assertNumQueries(0):
+            advert.setup_airtable()
+            deleted = advert.delete_record()
         self.assertTrue(deleted)
         advert.airtable_client._table.delete.assert_called_once_with("recNewRecordId")
 
     def test_parse_request_error(self):
-        error_401 = "401 Client Error: Unauthorized for url: https://api.airtable.com/v0/appYourAppId/Your%20Table?filterByFormula=.... [Error: {'type': 'AUTHENTICATION_REQUIRED', 'message': 'Authentication required'}]"
-        parsed_error = AirtableMixin.parse_request_error(error_401)
-        self.assertEqual(parsed_error['status_code'], 401)
-        self.assertEqual(parsed_error['type'], 'AUTHENTICATION_REQUIRED')
-        self.assertEqual(parsed_error['message'], 'Authentication required')
-
-        error_404 = "404 Client Error: Not Found for url: https://api.airtable.com/v0/app3dozZtsCotiIpf/Brokerages/nope [Error: NOT_FOUND]"
-        parsed_error = AirtableMixin.parse_request_error(error_404)
-        self.assertEqual(parsed_error['status_code'], 404)
-        self.assertEqual(parsed_error['type'], 'NOT_FOUND')
-        self.assertEqual(parsed_error['message'], 'Record not found')
-
-        error_404 = "404 Client Error: Not Found for url: https://api.airtable.com/v0/app3dozZtsCotiIpf/Brokerages%2022 [Error: {'type': 'TABLE_NOT_FOUND', 'message': 'Could not find table table_name in appxxxxx'}]"
-        parsed_error = AirtableMixin.parse_request_error(error_404)
-        self.assertEqual(parsed_error['status_code'], 404)
-        self.assertEqual(parsed_error['type'], 'TABLE_NOT_FOUND')
-        self.assertEqual(parsed_error['message'], 'Could not find table table_name in appxxxxx')
+        cases = [
+            (ERROR_401, 401, 'AUTHENTICATION_REQUIRED', 'Authentication required'),
+            (ERROR_404_NOT_FOUND, 404, 'NOT_FOUND', 'Record not found'),
+            (ERROR_404_TABLE_NOT_FOUND, 404, 'TABLE_NOT_FOUND', 'Could not find table table_name in appxxxxx'),
+        ]
+        for error, status_code, error_type, message in cases:
+            with self.subTest(error_type=error_type):
+                parsed_error = AirtableMixin.parse_request_error(error)
+                self.assertEqual(parsed_error['status_code'], status_code)
+                self.assertEqual(parsed_error['type'], error_type)
+                self.assertEqual(parsed_error['message'], message)
 
     def test_match_record(self):
         advert = Advert.objects.get(slug='red-its-new-blue')
-        advert.setup_airtable()
-        record_id = advert.match_record()
+        with self.assertNumQueries(0):
+            advert.setup_airtable()
+            record_id = advert.match_record()
         self.assertEqual(record_id, 'recNewRecordId')
         advert.airtable_client._table.all.assert_called_once_with(formula=match({'slug': 'red-its-new-blue'}))
 
     def test_match_record_with_dict_identifier(self):
         page = SimplePage.objects.get(slug='home')
-        page.setup_airtable()
-        record_id = page.match_record()
+        with self.assertNumQueries(0):
+            page.setup_airtable()
+            record_id = page.match_record()
         self.assertEqual(record_id, 'recHomePageId')
         page.airtable_client._table.all.assert_called_once_with(formula=match({'Page Slug': 'home'}))
 
     def test_check_record_exists(self):
         advert = Advert.objects.get(airtable_record_id='recNewRecordId')
-        advert.setup_airtable()
-        record_exists = advert.check_record_exists('recNewRecordId')
+        with self.assertNumQueries(0):
+            advert.setup_airtable()
+            record_exists = advert.check_record_exists('recNewRecordId')
         self.assertTrue(record_exists)
         advert.airtable_client._table.get.assert_called_once_with('recNewRecordId')
@@ -1,8 +1,11 @@
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
 from django.core.exceptions import ImproperlyConfigured
-from django.test import TestCase, override_settings
+from django.test import RequestFactory, TestCase, override_settings
 
 from tests.models import Advert, Publication, SimilarToAdvert, SimplePage
 from wagtail_airtable.utils import (airtable_message,
@@ -14,8 +17,12 @@ from wagtail_airtable.mixins import AirtableMixin
 class TestUtilFunctions(TestCase):
     fixtures = ['test.json']
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.get(username='admin')
+
     def setUp(self):
-        self.client.login(username='admin', password='password')
+        self.client.force_login(self.admin_user)
 
     def test_get_model_for_path(self):
         advert_model = get_model_for_path("tests.Advert")
@@ -25,6 +32,11 @@ class TestUtilFunctions(TestCase):
         bad_model_path = get_model_for_path("tests.BadModelPathName")
         self.assertFalse(bad_model_path)
 
+    def test_get_model_for_path_does_not_query_database(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_model_for_path("tests.Advert"), Advert)
+            self.assertFalse(get_model_for_path("tests.BadModelPathName"))
+
     def test_get_validated_models_with_single_valid_model(self):
         models = ["tests.Advert"]
         models = get_validated_models(models=models)
@@ -61,14 +73,16 @@ class TestUtilFunctions(TestCase):
 
     def test_airtable_messages(self):
         instance = Advert.objects.first()
-        response = self.client.get('/admin/login/')
-        request = response.wsgi_request
+        # Build the request directly, with only the middleware the messages framework needs.
+        request = RequestFactory().get('/')
+        SessionMiddleware(lambda request: None).process_request(request)
+        MessageMiddleware(lambda request: None).process_request(request)
         result = airtable_message(request, instance, message="Custom message here", button_text="Custom button text")
         self.assertEqual(result, None)
 
         instance.airtable_record_id = 'recTestingRecordId'  # Enables the Airtable button
         result = airtable_message(request, instance, message="Second custom message here", button_text="2nd custom button text")
-        messages = list(get_messages(response.wsgi_request))
+        messages = list(get_messages(request))
         self.assertEqual(len(messages), 2)
 
         message1 = messages[0].message
@@ -1,27 +1,43 @@
+from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
 from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from tests.models import Advert
+from wagtail_airtable.forms import AirtableImportModelForm
 from unittest.mock import patch
-from .mock_airtable import get_mock_airtable
+from .mock_airtable import get_mock_airtable, reset_mock_airtable
 
 
 class TestAdminViews(TestCase):
     fixtures = ['test.json']
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
         airtable_mixins_patcher = patch("wagtail_airtable.mixins.Api", new_callable=get_mock_airtable())
-        airtable_mixins_patcher.start()
-        self.addCleanup(airtable_mixins_patcher.stop)
+        cls.mock_mixins_airtable = airtable_mixins_patcher.start()
+        cls.addClassCleanup(airtable_mixins_patcher.stop)
         airtable_importer_patcher = patch("wagtail_airtable.importer.Api", new_callable=get_mock_airtable())
-        self.mock_airtable = airtable_importer_patcher.start()
-        self.addCleanup(airtable_importer_patcher.stop)
+        cls.mock_airtable = airtable_importer_patcher.start()
+        cls.addClassCleanup(airtable_importer_patcher.stop)
+
+        cls.import_url = reverse('airtable_import_listing')
+        cls.advert_list_url = reverse('wagtailsnippets_tests_advert:list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.get(username='admin')
+        cls.first_advert_pk = Advert.objects.values_list('pk', flat=True).first()
+        cls.delete_me_pk = Advert.objects.values_list('pk', flat=True).get(slug='delete-me')
 
-        self.client.login(username='admin', password='password')
+    def setUp(self):
+        reset_mock_airtable(self.mock_mixins_airtable)
+        reset_mock_airtable(self.mock_airtable)
+        self.client.force_login(self.admin_user)
 
     def test_get(self):
-        response = self.client.get(reverse('airtable_import_listing'))
+        response = self.client.get(self.import_url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Models you can import from Airtable')
         self.assertContains(response, 'Advert')
@@ -31,18 +47,22 @@ class TestAdminViews(TestCase):
         advert = Advert.objects.get(airtable_record_id="recNewRecordId")
         self.assertNotEqual(advert.title, "Red! It's the new blue!")
 
-        response = self.client.post(reverse('airtable_import_listing'), {
+        response = self.client.post(self.import_url, {
             'model': 'tests.Advert',
         })
-        self.assertRedirects(response, reverse('airtable_import_listing'))
+        self.assertRedirects(response, self.import_url)
 
         advert.refresh_from_db()
         self.assertEqual(advert.title, "Red! It's the new blue!")
 
-    def test_list_snippets(self):
-        url = reverse('wagtailsnippets_tests_advert:list')
+    def test_import_form_follows_settings_changes(self):
+        self.assertTrue(AirtableImportModelForm({'model': 'tests.advert'}).is_valid())
+        with override_settings(AIRTABLE_IMPORT_SETTINGS={}):
+            self.assertFalse(AirtableImportModelForm({'model': 'tests.advert'}).is_valid())
+        self.assertTrue(AirtableImportModelForm({'model': 'tests.Advert'}).is_valid())
 
-        response = self.client.get(url)
+    def test_list_snippets(self):
+        response = self.client.get(self.advert_list_url)
         self.assertEqual(response.status_code, 200)
 
     def test_snippet_detail(self):
@@ -56,9 +76,7 @@ class TestAdminViews(TestCase):
         self.assertEqual(instance.airtable_record_id, '')
 
     def test_import_snippet_button_on_list_view(self):
-        url = reverse('wagtailsnippets_tests_advert:list')
-
-        response = self.client.get(url)
+        response = self.client.get(self.advert_list_url)
         self.assertContains(response, 'Import Advert')
 
     def test_no_import_snippet_button_on_list_view(self):
@@ -82,9 +100,7 @@ class TestAdminViews(TestCase):
         self.assertIn('Airtable record updated', messages[1].message)
 
     def test_airtable_message_on_instance_edit(self):
-        advert = Advert.objects.first()
-
-        url = reverse('wagtailsnippets_tests_advert:edit', args=[advert.pk])
+        url = reverse('wagtailsnippets_tests_advert:edit', args=[self.first_advert_pk])
 
         response = self.client.post(url, {
             'title': 'Edited',
@@ -99,9 +115,7 @@ class TestAdminViews(TestCase):
         self.assertIn('Airtable record updated', messages[1].message)
 
     def test_airtable_message_on_instance_delete(self):
-        advert = Advert.objects.get(slug='delete-me')
-
-        url = reverse('wagtailsnippets_tests_advert:delete', args=[advert.pk])
+        url = reverse('wagtailsnippets_tests_advert:delete', args=[self.delete_me_pk])
 
         response = self.client.post(url)
         messages = list(get_messages(response.wsgi_request))
@@ -110,23 +124,27 @@ class TestAdminViews(TestCase):
         self.assertIn('Airtable record deleted', messages[1].message)
 
     def test_snippet_list_redirect(self):
-        airtable_import_url = reverse("airtable_import_listing")
-        params = [
-            # DEBUG, next URL, expected redirect
-            (True, "http://testserver/redirect/", "http://testserver/redirect/"),
-            (True, "http://not-allowed-host/redirect/", airtable_import_url),
-            (False, "https://testserver/redirect/", "https://testserver/redirect/"),
-            (False, "http://testserver/redirect/", airtable_import_url),
-            (False, "https://not-allowed-host/redirect/", airtable_import_url),
-        ]
-        for debug, next_url, expected_location in params:
-            with self.subTest(
-                debug=debug, next_url=next_url, expected_location=expected_location
-            ):
-                with override_settings(DEBUG=debug):
-                    response = self.client.post(
-                        airtable_import_url,
-                        {"model": "Advert", "next": next_url},
-                        secure=next_url.startswith("https"),
-                    )
-                    self.assertEqual(response.url, expected_location)
+        params = {
+            # DEBUG: [(next URL, expected redirect)]
+            True: [
+                ("http://testserver/redirect/", "http://testserver/redirect/"),
+                ("http://not-allowed-host/redirect/", self.import_url),
+            ],
+            False: [
+                ("https://testserver/redirect/", "https://testserver/redirect/"),
+                ("http://testserver/redirect/", self.import_url),
+                ("https://not-allowed-host/redirect/", self.import_url),
+            ],
+        }
+        for debug, cases in params.items():
+            with override_settings(DEBUG=debug):
+                for next_url, expected_location in cases:
+                    with self.subTest(
+                        debug=debug, next_url=next_url, expected_location=expected_location
+                    ):
+                        response = self.client.post(
+                            self.import_url,
+                            {"model": "Advert", "next": next_url},
+                            secure=next_url.startswith("https"),
+                        )
+                        self.assertEqual(response.url, expected_location)
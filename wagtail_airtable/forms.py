@@ -1,5 +1,21 @@
+from functools import lru_cache
+
 from django import forms
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+@lru_cache(maxsize=1)
+def _get_importable_model_labels():
+    """Return the lowercased model labels from AIRTABLE_IMPORT_SETTINGS."""
+    return frozenset(label.lower() for label in getattr(settings, "AIRTABLE_IMPORT_SETTINGS", {}))
+
+
+@receiver(setting_changed)
+def _clear_importable_model_labels(*, setting, **kwargs):
+    if setting == "AIRTABLE_IMPORT_SETTINGS":
+        _get_importable_model_labels.cache_clear()
 
 
 class AirtableImportModelForm(forms.Form):
@@ -10,15 +26,8 @@ class AirtableImportModelForm(forms.Form):
         """Make sure this model is in the AIRTABLE_IMPORT_SETTINGS config."""
 
         model_label = self.cleaned_data["model"].lower()
-        airtable_settings = getattr(settings, "AIRTABLE_IMPORT_SETTINGS", {})
-        is_valid_model = False
-
-        for label, model_settings in airtable_settings.items():
-            if model_label == label.lower():
-                is_valid_model = True
-                break
 
-        if not is_valid_model:
+        if model_label not in _get_importable_model_labels():
             raise forms.ValidationError("You are importing an unsupported model")
 
         return model_label
@@ -1,6 +1,10 @@
+import datetime
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pyairtable import Api
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
 from django.db.models.fields.related import ManyToManyField
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from taggit.managers import TaggableManager
@@ -8,7 +12,9 @@ from wagtail import hooks
 from wagtail.models import Page
 from .utils import import_string
 from typing import NamedTuple, Optional
-from django.db import transaction
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +23,8 @@ class AirtableImportResult(NamedTuple):
     fields: dict
     new: bool
     errors: Optional[dict] = None
+    # The matching or newly created object, when the record was imported without errors.
+    instance: Optional[models.Model] = None
 
     def error_display(self):
         """
@@ -33,72 +41,104 @@ class AirtableImportResult(NamedTuple):
 
 
 def get_column_to_field_names(airtable_unique_identifier) -> tuple:
-    uniq_id_type = type(airtable_unique_identifier)
-    airtable_unique_identifier_column_name = None
-    airtable_unique_identifier_field_name = None
-    if uniq_id_type == str:
+    if isinstance(airtable_unique_identifier, str):
         # The unique identifier is a string.
         # Use it as the Airtable Column name and the Django field name
-        airtable_unique_identifier_column_name = airtable_unique_identifier
-        airtable_unique_identifier_field_name = airtable_unique_identifier
-    elif uniq_id_type == dict:
+        return (airtable_unique_identifier, airtable_unique_identifier)
+    if isinstance(airtable_unique_identifier, dict):
         # Unique identifier is a dictionary.
         # Use the key as the Airtable Column name and the value as the Django Field name.
-        (
-            airtable_unique_identifier_column_name,
-            airtable_unique_identifier_field_name,
-        ) = list(airtable_unique_identifier.items())[0]
-
-    return (
-        airtable_unique_identifier_column_name,
-        airtable_unique_identifier_field_name,
-    )
+        if not airtable_unique_identifier:
+            raise ValueError("AIRTABLE_UNIQUE_IDENTIFIER can't be an empty dictionary")
+        return next(iter(airtable_unique_identifier.items()))
+    # Any other setting isn't supported.
+    return (None, None)
 
 
 def convert_mapped_fields(record_fields_dict, mapped_fields_dict) -> dict:
     # Create a dictionary of newly mapped key:value pairs based on the `mappings` dict above.
     # This wil convert "airtable column name" to "django_field_name"
-    mapped_fields_dict = {
-        mapped_fields_dict[key]: value
-        for (key, value) in record_fields_dict.items()
-        if key in mapped_fields_dict
+    return {
+        field_name: record_fields_dict[column_name]
+        for (column_name, field_name) in mapped_fields_dict.items()
+        if column_name in record_fields_dict
     }
-    return mapped_fields_dict
 
 
-def get_data_for_new_model(data, record_id):
-    data_for_new_model = data.copy()
-    data_for_new_model["airtable_record_id"] = record_id
+# Primary key values are never copied from Airtable onto new objects.
+_PK_FIELD_NAMES = frozenset({"pk", "id"})
+
 
+def get_data_for_new_model(data, record_id):
     # First things first, remove any "pk" or "id" items from the mapped_import_fields
     # This will let Django and Wagtail handle the PK on its own, as it should.
     # When the model is saved it'll trigger a push to Airtable and automatically update
     # the necessary column with the new PK so it's always accurate.
-    for key in {
-        "pk",
-        "id",
-    }:
-        try:
-            del data_for_new_model[key]
-        except KeyError:
-            pass
-
+    data_for_new_model = {
+        field_name: value
+        for field_name, value in data.items()
+        if field_name not in _PK_FIELD_NAMES
+    }
+    data_for_new_model["airtable_record_id"] = record_id
     return data_for_new_model
 
 
+# Airtable records without a value in the unique identifier column aren't matched by it.
+_EMPTY_UNIQUE_IDENTIFIERS = (None, "")
+
+
+def _normalize_field_value(field, value):
+    # Convert a value to the type the field stores, so equal data in a different form
+    # (e.g. "5" for an IntegerField, or a naive datetime) isn't seen as a change.
+    value = field.to_python(value)
+    if isinstance(value, datetime.datetime) and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.get_default_timezone())
+    return value
+
+
+def field_value_changed(field, old_value, new_value):
+    if field is None or field.is_relation:
+        return old_value != new_value
+    try:
+        return _normalize_field_value(field, old_value) != _normalize_field_value(field, new_value)
+    except (ValidationError, ValueError, TypeError):
+        return old_value != new_value
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_serializer(dotted_path):
+    # Keyed by the dotted path rather than the model, so overriding
+    # AIRTABLE_IMPORT_SETTINGS can never return a stale serializer.
+    return import_string(dotted_path)
+
 
 class AirtableModelImporter:
-    def __init__(self, model, verbosity=1):
+    def __init__(self, model, verbosity=1, api=None):
         self.model = model
         self.model_settings = settings.AIRTABLE_IMPORT_SETTINGS[model._meta.label]
         self.model_is_page = issubclass(model, Page)
-        self.model_serializer = import_string(self.model_settings["AIRTABLE_SERIALIZER"])
+        self.model_serializer = _resolve_serializer(self.model_settings["AIRTABLE_SERIALIZER"])
+        # The column to field mappings are the same for every record, so only ask the model once.
+        self.mapped_import_fields = model.map_import_fields()
+        # Many-to-many fields can't be assigned directly, so find them once rather than for every value.
+        self.m2m_field_names = frozenset(
+            field.name
+            for field in model._meta.get_fields()
+            if isinstance(field, (TaggableManager, ClusterTaggableManager, ManyToManyField))
+        )
+        # Shared between every serializer created during this import, so custom serializer
+        # fields can cache lookups across records instead of querying for each one.
+        self.serializer_context = {"importer": self}
+        # Existing instances for the current page of records, filled by prefetch_existing_instances()
+        self._existing_by_record_id = None
+        self._existing_by_unique_identifier = None
 
         if verbosity >= 2:
             logger.setLevel(logging.DEBUG)
 
-        api = Api(api_key=settings.AIRTABLE_API_KEY)
-        self.airtable_client = api.table(
+        # An Api can be shared between importers, so they reuse the same HTTP connections.
+        self.api = api if api is not None else Api(api_key=settings.AIRTABLE_API_KEY)
+        self.airtable_client = self.api.table(
             self.model_settings.get("AIRTABLE_BASE_KEY"),
             self.model_settings.get("AIRTABLE_TABLE_NAME"),
         )
@@ -115,49 +155,75 @@ class AirtableModelImporter:
         ):
             raise ValueError("No unique columns are set in your Airtable configuration")
 
-        parent_page_id_setting = self.model_settings.get("PARENT_PAGE_ID", None)
-        if parent_page_id_setting:
-            if callable(parent_page_id_setting):
-                # A function was passed into the settings. Execute it.
-                parent_page_id = parent_page_id_setting()
-            elif isinstance(parent_page_id_setting, str):
-                parent_page_callable = import_string(parent_page_id_setting)
-                parent_page_id = parent_page_callable()
-            else:
-                parent_page_id = parent_page_id_setting
+        # When set, objects are written with bulk queries instead of being saved one at a time.
+        # This skips the model's save() method and the pre/post save signals.
+        self.bulk_batch_size = self.model_settings.get("AIRTABLE_IMPORT_BULK_BATCH_SIZE")
+        if self.bulk_batch_size and model._meta.parents:
+            raise ImproperlyConfigured(
+                "AIRTABLE_IMPORT_BULK_BATCH_SIZE can't be used with %s, as bulk_create() doesn't support "
+                "multi-table inheritance (including Wagtail pages)." % model._meta.label
+            )
+        if self.bulk_batch_size and not connections[
+            router.db_for_write(model)
+        ].features.can_return_rows_from_bulk_insert:
+            # New objects need their pk to set many-to-many values and pass to the hooks.
+            raise ImproperlyConfigured(
+                "AIRTABLE_IMPORT_BULK_BATCH_SIZE needs a database that returns primary keys "
+                "from bulk_create(), such as PostgreSQL or SQLite."
+            )
 
-            self.parent_page = Page.objects.get(pk=parent_page_id)
+    @cached_property
+    def parent_page(self):
+        """
+        The page new pages are created under, from the PARENT_PAGE_ID setting.
+
+        Only looked up when it's first needed, so imports that only update objects don't query for it.
+        run() resolves it before importing anything, so an invalid setting stops the import.
+        """
+        parent_page_id_setting = self.model_settings.get("PARENT_PAGE_ID", None)
+        if not parent_page_id_setting:
+            return None
+
+        if callable(parent_page_id_setting):
+            # A function was passed into the settings. Execute it.
+            parent_page_id = parent_page_id_setting()
+        elif isinstance(parent_page_id_setting, str):
+            parent_page_callable = import_string(parent_page_id_setting)
+            parent_page_id = parent_page_callable()
         else:
-            self.parent_page = None
+            parent_page_id = parent_page_id_setting
+
+        return Page.objects.get(pk=parent_page_id)
 
     def field_is_m2m(self, field_name):
-        field_type = type(self.model._meta.get_field(field_name))
-
-        return issubclass(
-            field_type,
-            (
-                TaggableManager,
-                ClusterTaggableManager,
-                ManyToManyField,
-            )
-        )
+        return field_name in self.m2m_field_names
 
     def update_object(self, instance, record_id, data):
         if self.model_is_page and instance.locked:
             logger.debug("Instance for %s is locked. Not updating.", record_id)
             return False
 
-        if self.model_is_page:
-            before = instance.to_json()
-
+        # Pages get a new revision on every save, so only save them if an imported value changed.
+        changed = not self.model_is_page
         for field_name, value in data.items():
             if self.field_is_m2m(field_name):
                 # override existing values
-                getattr(instance, field_name).set(value)
+                related_manager = getattr(instance, field_name)
+                if not changed:
+                    before = set(related_manager.all())
+                related_manager.set(value)
+                if not changed:
+                    changed = set(related_manager.all()) != before
             else:
+                if not changed:
+                    try:
+                        field = self.model._meta.get_field(field_name)
+                    except FieldDoesNotExist:
+                        field = None
+                    changed = field_value_changed(field, getattr(instance, field_name), value)
                 setattr(instance, field_name, value)
 
-        if self.model_is_page and before == instance.to_json():
+        if not changed:
             logger.debug("Instance %s didn't change, skipping save.", record_id)
             return False
 
@@ -215,12 +281,65 @@ class AirtableModelImporter:
         for fn in hooks.get_hooks("airtable_import_record_updated"):
             fn(instance=new_model, is_wagtail_page=self.model_is_page, record_id=record_id)
 
+        return new_model
+
+    def prefetch_existing_instances(self, records):
+        """
+        Look up the existing instances for a page of Airtable records, with one query for the
+        record IDs and one for the unique identifiers, instead of two queries per record.
+        """
+        if self.airtable_unique_identifier_field_name == "pk":
+            unique_field = self.model._meta.pk
+        else:
+            unique_field = self.model._meta.get_field(self.airtable_unique_identifier_field_name)
+        self._unique_field = unique_field
+
+        unique_identifiers = set()
+        for record in records:
+            unique_identifier = self._get_unique_lookup_value(record["fields"], unique_field)
+            if unique_identifier is not None:
+                unique_identifiers.add(unique_identifier)
+
+        self._existing_by_record_id = {}
+        # Rows found by both queries share one instance, so an update is seen by either lookup.
+        instances_by_pk = {}
+        # Ordered by pk so the first match wins, like .first() in get_existing_instance()
+        for instance in self.model.objects.filter(
+            airtable_record_id__in=[record["id"] for record in records]
+        ).order_by("pk"):
+            instances_by_pk[instance.pk] = instance
+            self._existing_by_record_id.setdefault(instance.airtable_record_id, instance)
+
+        self._existing_by_unique_identifier = {}
+        for instance in self.model.objects.filter(
+            **{"%s__in" % unique_field.name: unique_identifiers}
+        ).order_by("pk"):
+            instance = instances_by_pk.get(instance.pk, instance)
+            self._existing_by_unique_identifier.setdefault(unique_field.value_from_object(instance), instance)
+
+    def _get_unique_lookup_value(self, fields, unique_field):
+        unique_identifier = fields.get(self.airtable_unique_identifier_column_name, None)
+        if unique_identifier in _EMPTY_UNIQUE_IDENTIFIERS:
+            return None
+        try:
+            # Match the type of the values loaded from the database, e.g. "5" for an IntegerField
+            return unique_field.to_python(unique_identifier)
+        except ValidationError:
+            return None
+
     def get_existing_instance(self, record_id, unique_identifier):
+        if self._existing_by_record_id is not None:
+            return self._get_prefetched_instance(record_id, unique_identifier)
+
         existing_by_record_id = self.model.objects.filter(airtable_record_id=record_id).first()
         if existing_by_record_id is not None:
             logger.debug("Found existing instance by id: %s", existing_by_record_id.id)
             return existing_by_record_id
 
+        if unique_identifier in _EMPTY_UNIQUE_IDENTIFIERS:
+            # A blank identifier would match unrelated rows with an empty or NULL value.
+            return None
+
         existing_by_unique_identifier = self.model.objects.filter(
             **{self.airtable_unique_identifier_field_name: unique_identifier}
         ).first()
@@ -231,14 +350,56 @@ class AirtableModelImporter:
         # Couldn't find an instance
         return None
 
-    @transaction.atomic
-    def process_record(self, record):
+    def _get_prefetched_instance(self, record_id, unique_identifier):
+        existing_by_record_id = self._existing_by_record_id.get(record_id)
+        if existing_by_record_id is not None:
+            logger.debug("Found existing instance by id: %s", existing_by_record_id.id)
+            return existing_by_record_id
+
+        unique_identifier = self._get_unique_lookup_value(
+            {self.airtable_unique_identifier_column_name: unique_identifier}, self._unique_field
+        )
+        existing_by_unique_identifier = self._existing_by_unique_identifier.get(unique_identifier)
+        if existing_by_unique_identifier is not None:
+            logger.debug("Found existing instance by unique identifier: %s", existing_by_unique_identifier.id)
+            return existing_by_unique_identifier
+
+        return None
+
+    def _remember_instance(self, instance):
+        # Later records in the same page should update this instance rather than create another.
+        if self._existing_by_record_id is not None:
+            self._existing_by_record_id.setdefault(instance.airtable_record_id, instance)
+            unique_identifier = self._unique_field.value_from_object(instance)
+            if unique_identifier not in _EMPTY_UNIQUE_IDENTIFIERS:
+                self._existing_by_unique_identifier.setdefault(unique_identifier, instance)
+
+    def _get_prefetched_keys(self, instance):
+        if self._existing_by_record_id is None:
+            return None
+        return instance.airtable_record_id, self._unique_field.value_from_object(instance)
+
+    def _rekey_instance(self, instance, keys):
+        # An update can change the record ID and unique identifier the instance was found by.
+        if keys is None:
+            return
+        record_id, unique_identifier = keys
+        if self._existing_by_record_id.get(record_id) is instance:
+            del self._existing_by_record_id[record_id]
+        if self._existing_by_unique_identifier.get(unique_identifier) is instance:
+            del self._existing_by_unique_identifier[unique_identifier]
+        self._remember_instance(instance)
+
+    def validate_record(self, record):
+        """
+        Map an Airtable record's columns to model fields and validate them with the serializer.
+
+        Returns the existing instance for the record (or None) and the validated serializer.
+        """
         record_id = record['id']
         fields = record["fields"]
 
-        mapped_import_fields = convert_mapped_fields(
-            fields, self.model.map_import_fields()
-        )
+        mapped_import_fields = convert_mapped_fields(fields, self.mapped_import_fields)
 
         unique_identifier = fields.get(
             self.airtable_unique_identifier_column_name, None
@@ -246,13 +407,25 @@ class AirtableModelImporter:
         obj = self.get_existing_instance(record_id, unique_identifier)
 
         logger.debug("Validating data for %s", record_id)
-        serializer = self.model_serializer(data=mapped_import_fields)
+        serializer = self.model_serializer(
+            data=mapped_import_fields, context=self.serializer_context
+        )
+        serializer.is_valid()
+        return obj, serializer
 
-        if not serializer.is_valid():
+    @transaction.atomic
+    def process_record(self, record):
+        record_id = record['id']
+        fields = record["fields"]
+
+        obj, serializer = self.validate_record(record)
+
+        if serializer.errors:
             return AirtableImportResult(record_id, fields, errors=serializer.errors, new=obj is not None)
 
         if obj:
             logger.debug("Attempting update of %s", obj.id)
+            prefetched_keys = self._get_prefetched_keys(obj)
             try:
                 was_updated = self.update_object(
                     instance=obj,
@@ -260,23 +433,196 @@ class AirtableModelImporter:
                     data=serializer.validated_data,
                 )
             except Exception as e:  # noqa: B902
+                if prefetched_keys is not None:
+                    # The instance may be left with some of the new values, which were rolled back
+                    # in the database. Look up the rest of this page's records from the database.
+                    self._existing_by_record_id = None
+                    self._existing_by_unique_identifier = None
                 return AirtableImportResult(record_id, fields, new=False, errors={"exception": e})
+            self._rekey_instance(obj, prefetched_keys)
             if was_updated:
                 logger.debug("Updated instance for %s", record_id)
             else:
                 logger.debug("Skipped update for %s", record_id)
-            return AirtableImportResult(record_id, fields, new=False)
+            return AirtableImportResult(record_id, fields, new=False, instance=obj)
         else:
             logger.debug("Creating model for %s", record_id)
             try:
-                self.create_object(serializer.validated_data, record_id)
+                new_instance = self.create_object(serializer.validated_data, record_id)
             except Exception as e:  # noqa: B902
                 return AirtableImportResult(record_id, fields, new=True, errors={"exception": e})
+            self._remember_instance(new_instance)
             logger.debug("Created instance for %s", record_id)
-            return AirtableImportResult(record_id, fields, new=True)
+            return AirtableImportResult(record_id, fields, new=True, instance=new_instance)
+
+    @transaction.atomic
+    def process_records_in_bulk(self, records):
+        """
+        Import a page of Airtable records, writing all of their objects with bulk queries.
+
+        The existing instances for the records must already be prefetched, as run() does, so that
+        records sharing a record ID or unique identifier with an earlier new object in the page
+        update that object, like they would when saved one at a time.
+
+        Returns a list of results in the same order as the records. If a write fails, every valid
+        record in the page is reported with the exception, and everything done while importing
+        the page is rolled back, including objects created by the serializers.
+        """
+        results = [None] * len(records)
+        # (index, obj, is_new) for every valid record
+        written = []
+        # Objects to write, keyed by id() as unsaved objects can't be hashed.
+        new_objects = {}
+        updated_objects = {}
+        update_fields = {"airtable_record_id"}
+        # The last value for each (object, field), as a later record replaces an earlier one's.
+        m2m_values = {}
+
+        for index, record in enumerate(records):
+            record_id = record['id']
+            logger.debug("Processing record %s", record_id)
+            obj, serializer = self.validate_record(record)
+
+            if serializer.errors:
+                results[index] = AirtableImportResult(
+                    record_id, record["fields"], errors=serializer.errors, new=obj is not None
+                )
+                continue
+
+            if obj is None:
+                data = get_data_for_new_model(serializer.validated_data, record_id)
+                obj = self.model()
+                new_objects[id(obj)] = obj
+                written.append((index, obj, True))
+            else:
+                # Primary keys are never changed by an import.
+                data = {
+                    field_name: value
+                    for field_name, value in serializer.validated_data.items()
+                    if field_name not in _PK_FIELD_NAMES
+                }
+                if obj.pk is not None:
+                    updated_objects[id(obj)] = obj
+                written.append((index, obj, False))
+
+            prefetched_keys = self._get_prefetched_keys(obj)
+            for field_name, value in data.items():
+                if self.field_is_m2m(field_name):
+                    # Related objects can only be set once the new objects have a pk.
+                    m2m_values[id(obj), field_name] = (obj, field_name, value)
+                else:
+                    setattr(obj, field_name, value)
+                    if obj.pk is not None:
+                        update_fields.add(field_name)
+
+            obj.airtable_record_id = record_id
+            obj.push_to_airtable = False
+            obj._skip_signals = True
+            self._rekey_instance(obj, prefetched_keys)
+
+        if not written:
+            return results
+
+        try:
+            with transaction.atomic():
+                if new_objects:
+                    self.model.objects.bulk_create(
+                        list(new_objects.values()), batch_size=self.bulk_batch_size
+                    )
+                if updated_objects:
+                    self.model.objects.bulk_update(
+                        list(updated_objects.values()),
+                        fields=sorted(update_fields),
+                        batch_size=self.bulk_batch_size,
+                    )
+                self.set_m2m_values_in_bulk(m2m_values.values())
+        except Exception as e:  # noqa: B902
+            transaction.set_rollback(True)
+            for index, _, is_new in written:
+                record = records[index]
+                results[index] = AirtableImportResult(
+                    record["id"], record["fields"], new=is_new, errors={"exception": e}
+                )
+            return results
+
+        for index, obj, is_new in written:
+            record = records[index]
+            for fn in hooks.get_hooks("airtable_import_record_updated"):
+                fn(instance=obj, is_wagtail_page=False, record_id=record["id"])
+            results[index] = AirtableImportResult(record["id"], record["fields"], new=is_new, instance=obj)
+
+        return results
+
+    def set_m2m_values_in_bulk(self, m2m_values):
+        """
+        Replace the related objects for a list of (instance, field_name, value) tuples.
+
+        Plain many-to-many fields are written straight to their through table, with one delete
+        and one insert per field. Tags and custom through models are set one instance at a time.
+        """
+        through_rows = {}
+        for obj, field_name, value in m2m_values:
+            field = self.model._meta.get_field(field_name)
+            if not (isinstance(field, ManyToManyField) and field.remote_field.through._meta.auto_created):
+                getattr(obj, field_name).set(value)
+                continue
+
+            instance_ids, rows = through_rows.setdefault(field, (set(), []))
+            instance_ids.add(obj.pk)
+            through = field.remote_field.through
+            for related in value:
+                rows.append(through(**{
+                    field.m2m_column_name(): obj.pk,
+                    field.m2m_reverse_name(): getattr(related, "pk", related),
+                }))
+
+        for field, (instance_ids, rows) in through_rows.items():
+            through = field.remote_field.through
+            through.objects.filter(**{"%s__in" % field.m2m_field_name(): instance_ids}).delete()
+            through.objects.bulk_create(rows, ignore_conflicts=True, batch_size=self.bulk_batch_size)
+
+    def iterate_pages(self):
+        """
+        Yield pages of Airtable records, fetching the next page in a background thread
+        while the current page is being imported.
+        """
+        pages = iter(self.airtable_client.iterate())
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            next_page = executor.submit(next, pages, None)
+            while True:
+                page = next_page.result()
+                if page is None:
+                    return
+                next_page = executor.submit(next, pages, None)
+                yield page
+        finally:
+            # If the caller stops early, wait for a request that's already running, as the Api's
+            # session may be shared with another importer and isn't thread-safe.
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def run(self):
-        for page in self.airtable_client.iterate():
-            for record in page:
-                logger.info("Processing record %s", record["id"])
-                yield self.process_record(record)
+        if self.model_is_page:
+            # Resolve PARENT_PAGE_ID before any record is written, so a broken setting stops
+            # the import straight away rather than failing every new page in turn.
+            parent_page = self.parent_page
+            logger.debug("New pages will be created under %s", parent_page)
+
+        for page in self.iterate_pages():
+            if not page:
+                # Nothing to look up or write for an empty table.
+                continue
+
+            self.prefetch_existing_instances(page)
+            try:
+                if self.bulk_batch_size:
+                    yield from self.process_records_in_bulk(page)
+                    continue
+
+                for record in page:
+                    logger.debug("Processing record %s", record["id"])
+                    yield self.process_record(record)
+            finally:
+                # The prefetched instances only cover this page, so later lookups go back to the database.
+                self._existing_by_record_id = None
+                self._existing_by_unique_identifier = None
@@ -31,8 +31,11 @@ class Command(BaseCommand):
         new_results = 0
         updated_results = 0
 
+        # Every model uses the same API key, so share one client between the importers.
+        api = None
         for model in get_validated_models(options["model_names"]):
-            importer = AirtableModelImporter(model=model, verbosity=options["verbosity"])
+            importer = AirtableModelImporter(model=model, verbosity=options["verbosity"], api=api)
+            api = importer.api
 
             for result in importer.run():
                 if result.errors:
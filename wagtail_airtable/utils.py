@@ -2,6 +2,7 @@
 Utility functions for wagtail-airtable.
 """
 from importlib import import_module
+from django.apps import apps
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
@@ -18,10 +19,9 @@ def get_model_for_path(model_path):
     """
     app_label, model_name = model_path.lower().split(".")
     try:
-        return ContentType.objects.get_by_natural_key(
-            app_label, model_name
-        ).model_class()
-    except ObjectDoesNotExist:
+        # Use the app registry rather than ContentType, so no database query is needed.
+        return apps.get_model(app_label, model_name)
+    except LookupError:
         return False
 
 
@@ -87,10 +87,11 @@ def get_validated_models(models=[], as_path=False) -> list:
             validated_models.append(model)
 
     models = validated_models[:]
+    airtable_settings = getattr(settings, "AIRTABLE_IMPORT_SETTINGS", {})
     for model in validated_models:
-        airtable_settings = settings.AIRTABLE_IMPORT_SETTINGS.get(model._meta.label, )
+        model_settings = airtable_settings.get(model._meta.label, {})
         # Remove this model from the `models` list so it doesn't hit the Airtable API.
-        if not airtable_settings.get("AIRTABLE_IMPORT_ALLOWED", True):
+        if not model_settings.get("AIRTABLE_IMPORT_ALLOWED", True):
             models.remove(model)
 
     if as_path: